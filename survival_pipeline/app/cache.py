@@ -0,0 +1,50 @@
+"""
+Cache Configuration
+"""
+
+import hashlib
+import json
+import os
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from dotenv import load_dotenv
+
+
+def make_key(prefix: str, *parts):
+    """
+    Function to build a cache key from a prefix and the request parameters.
+    """
+    digest = hashlib.md5(repr(parts).encode()).hexdigest()
+    return f"{prefix}:{digest}"
+
+
+async def get_cached(key: str):
+    """
+    Function to read a cached value. Returns None on a miss or if Redis is unavailable.
+    """
+    try:
+        value = await client.get(key)
+    except RedisError:
+        return None
+    return json.loads(value) if value is not None else None
+
+
+async def set_cached(key: str, value, ttl: int = 300):
+    """
+    Function to cache a value for ttl seconds. Failures are ignored so the API keeps serving from the database.
+    """
+    try:
+        await client.setex(key, ttl, json.dumps(value, default=str))
+    except RedisError:
+        pass
+
+
+# Load environment variables from .env file
+load_dotenv(".env")
+
+# Get the Redis URL from environment variables
+REDIS_URL = os.environ.get("REDIS_URL", "redis://redis:6379/0")
+
+# Redis client shared by all requests, with short timeouts so an unresponsive Redis counts as a cache miss
+client = redis.from_url(REDIS_URL, socket_connect_timeout=0.25, socket_timeout=0.25)
@@ -2,29 +2,26 @@
 Database Configuration
 """
 
-import sqlalchemy as sql
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 import sqlalchemy.ext.declarative as declarative
-import sqlalchemy.orm as orm
 from dotenv import load_dotenv
 import os
 
 
-def _add_tables(engine):
+async def _add_tables(engine):
     """
     Function to add tables to the database.
     """
-    return Base.metadata.create_all(bind=engine)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
 
 
-def get_db():
+async def get_db():
     """
-    Function to get a database session.
+    Function to get an asynchronous database session.
     """
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 # Load environment variables from .env file
@@ -33,11 +30,21 @@ load_dotenv(".env")
 # Get the database URL from environment variables
 DATABASE_URL = os.environ.get("DATABASE_URL")
 
-# Create the SQLAlchemy engine
-engine = sql.create_engine(DATABASE_URL)
+# Create the asynchronous SQLAlchemy engine (requires the asyncpg driver).
+# The pool keeps a warm set of connections sized for concurrent API requests.
+engine = create_async_engine(
+    DATABASE_URL,
+    pool_size=20,
+    max_overflow=40,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    pool_use_lifo=True,
+)
 
 # Base class for declarative models
 Base = declarative.declarative_base()
 
 # SessionLocal for database operations
-SessionLocal = orm.sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(
+    bind=engine, autoflush=False, expire_on_commit=False
+)
@@ -15,13 +15,19 @@ Endpoints:
 import uvicorn
 from typing import Union, List
 from fastapi import FastAPI, Depends, HTTPException, Body, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, insert, literal, select
 from datetime import datetime
 
 
-from schema import OutboundCalls as OC, OutboundMessage as OM
+from schema import (
+    OutboundCalls as OC,
+    OutboundMessage as OM,
+    ClientInfo,
+    SurvivalPrediction,
+)
 from database import Base, engine, get_db
+from cache import make_key, get_cached, set_cached
 from models import (
     OutboundCalls,
     ConsumerClient,
@@ -34,6 +40,36 @@ from models import (
 app = FastAPI()
 
 
+async def fetch_client_contacts(db: AsyncSession, contact_column, cliids: List[int]):
+    """
+    Fetches a contact column (phone or email) for several clients with a single query.
+
+    Args:
+        db (AsyncSession): Database session.
+        contact_column: ConsumerClient column to fetch, e.g. ConsumerClient.phone.
+        cliids (List[int]): List of client IDs.
+
+    Returns:
+        Dict[int, str]: Mapping of cliid to the requested contact.
+
+    Raises:
+        HTTPException: 404 listing every cliid that does not exist.
+    """
+    result = await db.execute(
+        select(ConsumerClient.cliid, contact_column).where(
+            ConsumerClient.cliid.in_(cliids)
+        )
+    )
+    found = dict(result.all())
+
+    missing = set(cliids) - found.keys()
+    if missing:
+        raise HTTPException(
+            status_code=404, detail=f"No clients found with cliids {sorted(missing)}"
+        )
+    return found
+
+
 # Default endpoint
 @app.get("/")
 async def root():
@@ -44,9 +80,9 @@ async def root():
 
 
 # Endpoint to retrieve client information by cliid
-@app.get("/get_client_info/")
+@app.get("/get_client_info/", response_model=List[ClientInfo])
 async def get_client_info(
-    cliids: List[int] = Query(...), db: Session = Depends(get_db)
+    cliids: List[int] = Query(...), db: AsyncSession = Depends(get_db)
 ):
     """
     Retrieves client information by cliid(s).
@@ -55,31 +91,36 @@ async def get_client_info(
         cliids (List[int]): List of cliids for which client information is to be retrieved.
 
     Returns:
-        List[Dict[str, Union[int, str]]]: List of dictionaries containing client information including cliid, phone, and email.
+        List[ClientInfo]: List of client information including cliid, phone, and email.
     """
-    clients_info = (
-        db.query(ConsumerClient.cliid, ConsumerClient.phone, ConsumerClient.email)
-        .filter(ConsumerClient.cliid.in_(cliids))
-        .all()
+    # Serve repeated lookups of the same clients from the cache
+    cache_key = make_key("client_info", *sorted(set(cliids)))
+    cached_data = await get_cached(cache_key)
+    if cached_data is not None:
+        return cached_data
+
+    result = await db.execute(
+        select(ConsumerClient.cliid, ConsumerClient.phone, ConsumerClient.email).where(
+            ConsumerClient.cliid.in_(cliids)
+        )
     )
+    clients_info = result.all()
     if clients_info:
-        clients_data = [
-            {"cliid": client[0], "phone": client[1], "email": client[2]}
-            for client in clients_info
-        ]
-        return clients_data
+        await set_cached(cache_key, [client._asdict() for client in clients_info])
+        # Rows are validated against ClientInfo by the response model
+        return clients_info
     else:
         raise HTTPException(status_code=404, detail="No clients found")
 
 
 # Endpoint to retrieve survival data
-@app.get("/get_survival_data/")
+@app.get("/get_survival_data/", response_model=List[SurvivalPrediction])
 async def get_survival_data(
     pred_period: int = Query(...),
     lower_limit: float = Query(0),
     upper_limit: float = Query(1),
     date_created: datetime = Query(None),  # Default to None initially
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Retrieves survival data based on parameters.
@@ -91,17 +132,42 @@ async def get_survival_data(
         date_created (datetime): Date when the survival data was created. If not provided, latest date_created is chosen.
 
     Returns:
-        List[Dict[str, Union[int, float]]]: List of dictionaries containing survival data including cliid and survival probability.
+        List[SurvivalPrediction]: List of survival data including cliid and survival probability.
     """
 
-    # If date_created is not provided, fetch the maximal date_created from SurvivalPredictions
+    # If date_created is not provided, fetch the latest date_created from SurvivalPredictions.
+    # Predictions are generated in batches, so the latest date is cached for a minute.
     if date_created is None:
-        max_date_created = db.query(func.max(SurvivalPredictions.date_created)).scalar()
+        max_date_created = await get_cached("survival_data:latest_date_created")
+        if max_date_created is not None:
+            max_date_created = datetime.fromisoformat(max_date_created)
+        else:
+            max_date_created = await db.scalar(
+                select(SurvivalPredictions.date_created)
+                .where(SurvivalPredictions.date_created.isnot(None))
+                .order_by(SurvivalPredictions.date_created.desc())
+                .limit(1)
+            )
+            if max_date_created:
+                await set_cached(
+                    "survival_data:latest_date_created",
+                    max_date_created.isoformat(),
+                    ttl=60,
+                )
         date_created = max_date_created if max_date_created else datetime.now()
 
-    survival_data = (
-        db.query(SurvivalPredictions.cliid, SurvivalPredictions.survival_probability)
-        .filter(
+    # Serve repeated queries with the same parameters from the cache
+    cache_key = make_key(
+        "survival_data", pred_period, lower_limit, upper_limit, date_created.isoformat()
+    )
+    cached_data = await get_cached(cache_key)
+    if cached_data is not None:
+        return cached_data
+
+    result = await db.execute(
+        select(
+            SurvivalPredictions.cliid, SurvivalPredictions.survival_probability
+        ).where(
             and_(
                 SurvivalPredictions.pred_period == pred_period,
                 SurvivalPredictions.survival_probability >= lower_limit,
@@ -109,16 +175,13 @@ async def get_survival_data(
                 SurvivalPredictions.date_created == date_created,
             )
         )
-        .all()
     )
+    survival_data = result.all()
 
-    # Format the query results into a list of dictionaries
-    formatted_data = [
-        {"cliid": row[0], "survival_probability": row[1]} for row in survival_data
-    ]
-
-    if formatted_data:
-        return formatted_data
+    if survival_data:
+        await set_cached(cache_key, [row._asdict() for row in survival_data])
+        # Rows are validated against SurvivalPrediction by the response model
+        return survival_data
     else:
         raise HTTPException(
             status_code=404, detail="No survival data found for the given parameters"
@@ -127,7 +190,9 @@ async def get_survival_data(
 
 # Endpoint to create a new outbound call
 @app.post("/create_call/", response_model=OC)
-def create_call(Outbound: OC, cliid: int, db: Session = Depends(get_db)):
+async def create_call(
+    Outbound: OC, cliid: int, db: AsyncSession = Depends(get_db)
+):
     """
     Creates a new outbound call record for a client.
 
@@ -138,27 +203,44 @@ def create_call(Outbound: OC, cliid: int, db: Session = Depends(get_db)):
     Returns:
         OutboundCalls: Details of the newly created outbound call.
     """
-    client_info = db.query(ConsumerClient).filter(ConsumerClient.cliid == cliid).first()
-
-    # adding new Outbound Call in OutboundCalls table
-    new_call = OutboundCalls(
-        phone=client_info.phone,
-        call_status=Outbound.call_status,
-        comment=Outbound.comment,
-        operator_name=Outbound.operator_name,
-        cliid=client_info.cliid,
+    # Insert the call with the client's phone taken server-side in a single round-trip
+    insert_call = (
+        insert(OutboundCalls)
+        .from_select(
+            ["cliid", "phone", "call_status", "comment", "operator_name"],
+            select(
+                ConsumerClient.cliid,
+                ConsumerClient.phone,
+                literal(Outbound.call_status, OutboundCalls.call_status.type),
+                literal(Outbound.comment, OutboundCalls.comment.type),
+                literal(Outbound.operator_name, OutboundCalls.operator_name.type),
+            ).where(ConsumerClient.cliid == cliid),
+        )
+        .returning(
+            OutboundCalls.row_id,
+            OutboundCalls.cliid,
+            OutboundCalls.phone,
+            OutboundCalls.date_called,
+            OutboundCalls.call_status,
+            OutboundCalls.comment,
+            OutboundCalls.operator_name,
+        )
     )
+    new_call = (await db.execute(insert_call)).mappings().one_or_none()
 
-    db.add(new_call)
-    db.commit()
-    db.refresh(new_call)
-    return new_call
+    if new_call is None:
+        raise HTTPException(
+            status_code=404, detail=f"No client found with cliid {cliid}"
+        )
+
+    await db.commit()
+    return dict(new_call)
 
 
 # Endpoint to create new outbound text message
 @app.post("/create_text/", response_model=List[OM])
-def create_text(
-    Outbound: OM, cliids: List[int] = Body(...), db: Session = Depends(get_db)
+async def create_text(
+    Outbound: OM, cliids: List[int] = Body(...), db: AsyncSession = Depends(get_db)
 ):
     """
     Creates new outbound text messages for one or more clients.
@@ -171,38 +253,42 @@ def create_text(
         List[OutboundMessage]: List of details of the newly created outbound text messages.
     """
 
-    texts_created = []
-
-    for cliid in cliids:
-        client_info = (
-            db.query(ConsumerClient).filter(ConsumerClient.cliid == cliid).first()
-        )
-
-        if client_info:
-            new_text = OutboundTexts(
-                phone=client_info.phone,
-                sent_status=Outbound.sent_status,
-                content=Outbound.content,
-                cliid=client_info.cliid,
-            )
-
-            db.add(new_text)
-            db.commit()
-            db.refresh(new_text)
-
-            texts_created.append(new_text)
-        else:
-            raise HTTPException(
-                status_code=404, detail=f"No client found with cliid {cliid}"
-            )
+    if not cliids:
+        return []
+
+    # Fetch the phones of all requested clients in a single round-trip
+    clients_info = await fetch_client_contacts(db, ConsumerClient.phone, cliids)
+
+    # Insert all texts as one executemany, which SQLAlchemy splits into multi-row INSERT batches
+    # that stay under asyncpg's query argument limit, returning the server-generated values
+    insert_texts = insert(OutboundTexts).returning(
+        OutboundTexts.row_id,
+        OutboundTexts.cliid,
+        OutboundTexts.phone,
+        OutboundTexts.date_sent,
+        OutboundTexts.sent_status,
+        OutboundTexts.content,
+        sort_by_parameter_order=True,
+    )
+    rows = [
+        {
+            "cliid": cliid,
+            "phone": clients_info[cliid],
+            "sent_status": Outbound.sent_status,
+            "content": Outbound.content,
+        }
+        for cliid in cliids
+    ]
+    texts_created = (await db.execute(insert_texts, rows)).mappings().all()
+    await db.commit()
 
-    return texts_created
+    return [dict(row) for row in texts_created]
 
 
 # Endpoint to create new outbound email messages
 @app.post("/create_email/", response_model=List[OM])
-def create_email(
-    Outbound: OM, cliids: List[int] = Body(...), db: Session = Depends(get_db)
+async def create_email(
+    Outbound: OM, cliids: List[int] = Body(...), db: AsyncSession = Depends(get_db)
 ):
     """
     Creates new outbound email messages for one or more clients.
@@ -215,29 +301,33 @@ def create_email(
         List[OutboundMessage]: List of details of the newly created outbound email messages.
     """
 
-    emails_created = []
-
-    for cliid in cliids:
-        client_info = (
-            db.query(ConsumerClient).filter(ConsumerClient.cliid == cliid).first()
-        )
-
-        if client_info:
-            new_email = OutboundEmails(
-                email=client_info.email,
-                sent_status=Outbound.sent_status,
-                content=Outbound.content,
-                cliid=client_info.cliid,
-            )
-
-            db.add(new_email)
-            db.commit()
-            db.refresh(new_email)
-
-            emails_created.append(new_email)
-        else:
-            raise HTTPException(
-                status_code=404, detail=f"No client found with cliid {cliid}"
-            )
+    if not cliids:
+        return []
+
+    # Fetch the emails of all requested clients in a single round-trip
+    clients_info = await fetch_client_contacts(db, ConsumerClient.email, cliids)
+
+    # Insert all emails as one executemany, which SQLAlchemy splits into multi-row INSERT batches
+    # that stay under asyncpg's query argument limit, returning the server-generated values
+    insert_emails = insert(OutboundEmails).returning(
+        OutboundEmails.row_id,
+        OutboundEmails.cliid,
+        OutboundEmails.email,
+        OutboundEmails.date_sent,
+        OutboundEmails.sent_status,
+        OutboundEmails.content,
+        sort_by_parameter_order=True,
+    )
+    rows = [
+        {
+            "cliid": cliid,
+            "email": clients_info[cliid],
+            "sent_status": Outbound.sent_status,
+            "content": Outbound.content,
+        }
+        for cliid in cliids
+    ]
+    emails_created = (await db.execute(insert_emails, rows)).mappings().all()
+    await db.commit()
 
-    return emails_created
+    return [dict(row) for row in emails_created]
@@ -1,31 +1,60 @@
-from sqlalchemy import create_engine, Column, Enum, Integer, DateTime
+"""
+This module defines the enumerations and Pydantic schemas for outbound calls and messages.
+
+The same module is shipped with the 'app' and 'db_setup' services, which are built as separate Docker images.
+Keep both copies identical.
+"""
 from enum import Enum
-from pydantic import BaseModel
+from typing import Optional
+from pydantic import BaseModel, ConfigDict
 
 
+# Definition of CallStatus enumeration
 class CallStatus(str, Enum):
     failed = "Failed"
     rejected = "Rejected"
     accepted = "Accepted"
 
 
+# Definition of MessageStatus enumeration
 class MessageStatus(str, Enum):
     delivered = "Delivered"
     failed = "Failed"
 
 
+# Definition of OutboundCalls Pydantic model
 class OutboundCalls(BaseModel):
     call_status: CallStatus
     comment: str
     operator_name: str
 
 
+# Definition of OutboundMessage Pydantic model
 class OutboundMessage(BaseModel):
     sent_status: MessageStatus
     content: str
 
 
+# Definition of ClientInfo Pydantic model, validated directly from query rows
+class ClientInfo(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    cliid: int
+    phone: Optional[str]
+    email: Optional[str]
+
+
+# Definition of SurvivalPrediction Pydantic model, validated directly from query rows
+class SurvivalPrediction(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    cliid: int
+    survival_probability: float
+
+
 # Example usage:
 if __name__ == "__main__":
-    model = OutboundCalls(call_status=CallStatus.failed)
+    model = OutboundCalls(
+        call_status=CallStatus.failed, comment="No answer", operator_name="Operator"
+    )
     print(model)
@@ -4,11 +4,13 @@ Data Ingestion
 This module provides functionalities for ingesting data into database tables and executing stored procedures.
 """
 
-from sqlalchemy import text
-import pandas as pd
+import csv
+import io
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import text, Integer
 from os.path import join
 
-from database import engine, _add_tables
+from database import Base, engine, _add_tables
 from models import (
     Marz,
     ConsumerClient,
@@ -64,9 +66,66 @@ def executeprocedure(engine, procedure_name):
     return f"Procedure {procedure_name} executed!"
 
 
+class _CSVStream:
+    """
+    Minimal file-like wrapper that lets COPY read lines produced by a generator.
+    """
+
+    def __init__(self, lines):
+        self._lines = lines
+        self._buffer = ""
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._lines)
+            except StopIteration:
+                break
+        if size < 0:
+            chunk, self._buffer = self._buffer, ""
+        else:
+            chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
+def _clean_csv_rows(reader, columns, table_name):
+    """
+    Stream CSV rows, coercing float-formatted values (e.g. '2.0') of integer columns to integers.
+
+    Args:
+    - reader: csv.reader positioned after the header row.
+    - columns (list): Column names of the CSV file.
+    - table_name (str): Name of the database table the rows are loaded into.
+
+    Yields:
+    - str: A CSV formatted line.
+    """
+    table = Base.metadata.tables[table_name]
+    int_positions = [
+        i
+        for i, column in enumerate(columns)
+        if column in table.c and isinstance(table.c[column].type, Integer)
+    ]
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in reader:
+        for i in int_positions:
+            if row[i]:
+                row[i] = str(int(float(row[i])))
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
 def load_csv_to_table(table_name, csv_path):
     """
-    Load data from a CSV file into a database table.
+    Load data from a CSV file into a database table using PostgreSQL COPY.
+
+    The file is streamed to the server row by row, so memory use does not depend on the file size.
+    Rows are copied into a temporary staging table first and then inserted with ON CONFLICT DO NOTHING,
+    so re-running the ingestion does not duplicate or fail on already loaded rows.
 
     Args:
     - table_name: Name of the database table.
@@ -75,35 +134,79 @@ def load_csv_to_table(table_name, csv_path):
     Returns:
     - None
     """
-    df = pd.read_csv(csv_path)
-    df.to_sql(table_name, con=engine, if_exists="append", index=False)
+    raw_connection = engine.raw_connection()
+    try:
+        with open(csv_path, newline="", encoding="utf-8") as file:
+            reader = csv.reader(file)
+            columns = next(reader)
+            column_list = ", ".join(f'"{column}"' for column in columns)
+
+            staging_table = f"stg_{table_name}"
+
+            cursor = raw_connection.cursor()
+            cursor.execute(
+                f"CREATE TEMP TABLE {staging_table} (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+            cursor.copy_expert(
+                f"COPY {staging_table} ({column_list}) FROM STDIN WITH CSV",
+                _CSVStream(_clean_csv_rows(reader, columns, table_name)),
+            )
+            cursor.execute(
+                f"INSERT INTO {table_name} ({column_list}) "
+                f"SELECT {column_list} FROM {staging_table} ON CONFLICT DO NOTHING"
+            )
+            cursor.close()
+        raw_connection.commit()
+    finally:
+        raw_connection.close()
+
+
+# Define the tables to load, grouped into stages by foreign key dependencies.
+# Tables within a stage are independent of each other and are loaded in parallel.
+tables_to_load = [
+    ["marz"],
+    ["consumer_client"],
+    ["consumer_family_members", "consumer_main"],
+    ["consumer_hc", "eceng_vehicle_info", "eceng_ces_data"],
+]
 
 
-# Initiating Database Tables
-_add_tables(engine)
+def _load_table(table):
+    """
+    Load a table from its CSV file, reporting failures instead of raising them.
 
-# Define a list containing table names and their corresponding CSV file paths
-tables_to_load = [
-    "marz",
-    "consumer_client",
-    "consumer_family_members",
-    "consumer_main",
-    "consumer_hc",
-    "eceng_vehicle_info",
-    "eceng_ces_data",
-]
+    Args:
+    - table (str): Name of the database table.
 
-# Loop through the list of tables and CSV file paths, and load each CSV into its corresponding table
-for table in tables_to_load:
+    Returns:
+    - None
+    """
     try:
         load_csv_to_table(table, join("data/", f"{table}.csv"))
     except Exception as e:
         print(f"Failed to ingest table {table}. Moving to the next!")
 
-print("Tables are populated.")
 
-# Creating and executing the procedure for populating the survival_data table
-proc = "update_survival_data"
-create_stored_procedure(engine, "sql_queries", proc)
-executeprocedure(engine, proc)
-print(f"Procedure {proc} is executed")
+def main():
+    """
+    Create the database tables, load the seed CSVs and populate the survival_data table.
+    """
+    # Initiating Database Tables
+    _add_tables(engine)
+
+    # Loop through the stages, loading the CSVs of each stage into their corresponding tables concurrently
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for stage in tables_to_load:
+            list(executor.map(_load_table, stage))
+
+    print("Tables are populated.")
+
+    # Creating and executing the procedure for populating the survival_data table
+    proc = "update_survival_data"
+    create_stored_procedure(engine, "sql_queries", proc)
+    executeprocedure(engine, proc)
+    print(f"Procedure {proc} is executed")
+
+
+if __name__ == "__main__":
+    main()
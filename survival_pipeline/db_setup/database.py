@@ -33,8 +33,8 @@ load_dotenv(".env")
 # Get the database URL from environment variables
 DATABASE_URL = os.environ.get("DATABASE_URL")
 
-# Create the SQLAlchemy engine
-engine = sql.create_engine(DATABASE_URL)
+# Create the SQLAlchemy engine. Ingestion is a one-shot process, so connections are not pooled.
+engine = sql.create_engine(DATABASE_URL, poolclass=sql.pool.NullPool)
 
 # Base class for declarative models
 Base = declarative.declarative_base()
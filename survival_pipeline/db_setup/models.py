@@ -5,6 +5,7 @@ Database Schema
 import datetime as dt
 import sqlalchemy as sql
 from sqlalchemy import (
+    DDL,
     Column,
     Integer,
     String,
@@ -13,10 +14,12 @@ from sqlalchemy import (
     ForeignKey,
     Boolean,
     Enum,
+    Index,
+    event,
 )
 from sqlalchemy.sql import func
 
-from database import Base, engine, _add_tables
+from database import Base
 from schema import CallStatus, MessageStatus
 
 
@@ -175,6 +178,26 @@ class SurvivalPredictions(Base):
     pred_period = Column(Integer)
     survival_probability = Column(Float)
 
+    __table_args__ = (
+        Index("ix_survpred_date_created_desc", date_created.desc()),
+        Index(
+            "ix_survpred_period_date_prob",
+            "pred_period",
+            "date_created",
+            "survival_probability",
+        ),
+    )
+
+
+# Collect finer statistics on date_created for better planner estimates
+event.listen(
+    SurvivalPredictions.__table__,
+    "after_create",
+    DDL(
+        "ALTER TABLE survival_predictions ALTER COLUMN date_created SET STATISTICS 500"
+    ),
+)
+
 
 class OutboundCalls(Base):
     """
@@ -190,6 +213,8 @@ class OutboundCalls(Base):
     comment = Column(String(250))
     operator_name = Column(String(50))
 
+    __table_args__ = (Index("ix_outbound_calls_cliid", "cliid"),)
+
 
 class OutboundTexts(Base):
     """
@@ -204,6 +229,8 @@ class OutboundTexts(Base):
     sent_status = Column(Enum(MessageStatus))
     content = Column(String(250))
 
+    __table_args__ = (Index("ix_outbound_texts_cliid", "cliid"),)
+
 
 class OutboundEmails(Base):
     """
@@ -218,12 +245,4 @@ class OutboundEmails(Base):
     sent_status = Column(Enum(MessageStatus))
     content = Column(String(250))
 
-
-# _add_tables(engine)
-
-# recreate = True
-# if recreate:
-#     Base.metadata.drop_all(engine)
-#     print('The Schema is deleted')
-#     Base.metadata.create_all(bind=engine)
-#     print('new schema is created')
+    __table_args__ = (Index("ix_outbound_emails_cliid", "cliid"),)
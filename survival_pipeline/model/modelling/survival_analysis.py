@@ -1,8 +1,13 @@
 """
 Defines a class called Survival for implementing Kaplan-Meier and Accelerated-Failure Time (AFT) models.
 """
+import warnings
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from concurrent.futures import ProcessPoolExecutor
+from scipy import optimize, stats
 from .utils import map_to_group
 import matplotlib.pyplot as plt
 from lifelines import (
@@ -12,6 +17,91 @@ from lifelines import (
     LogNormalAFTFitter,
 )
 
+# AFT distributions compared by find_best_aft_model
+AFT_FITTERS = {
+    "Weibull": WeibullAFTFitter,
+    "Log-Normal": LogNormalAFTFitter,
+    "Log-Logistic": LogLogisticAFTFitter,
+}
+
+# Default time grid for plotting survival curves
+_DEFAULT_TIMES = np.linspace(0, 1200, 100)
+
+# Standardized error distributions of log(T) implied by each AFT distribution
+AFT_ERROR_DISTRIBUTIONS = {
+    "Weibull": stats.gumbel_l,
+    "Log-Normal": stats.norm,
+    "Log-Logistic": stats.logistic,
+}
+
+
+def _fit_aft(
+    model_name: str, survival_df: pd.DataFrame, duration_col: str, event_col: str
+):
+    """Fits one AFT distribution. Defined at module level so it can run in a worker process.
+
+    Args:
+        model_name (str): Key of the distribution in AFT_FITTERS.
+        survival_df (pd.DataFrame): Survival data without the primary key column.
+        duration_col (str): Column name for the 'duration' or 'time' data.
+        event_col (str): Column name for the 'event occurred' data.
+
+    Returns:
+        tuple: The model name, the fitted AFT model and its AIC.
+    """
+    model = AFT_FITTERS[model_name]()
+    model.fit(survival_df, duration_col=duration_col, event_col=event_col)
+    return model_name, model, model.AIC_
+
+
+def _screen_aft_distributions(
+    weibull_model, survival_df: pd.DataFrame, duration_col: str, event_col: str
+):
+    """Picks the most likely AFT distribution from the residuals of a fitted Weibull AFT model.
+
+    The AFT models share the form log(T) = X @ beta + sigma * e and differ only in the distribution of e.
+    The residuals log(T) - X @ beta of the Weibull fit are reused for every candidate, and only a location
+    and scale are fitted per distribution by maximizing the censored log-likelihood
+    sum(event * (log f(z) - log sigma)) + sum((1 - event) * log S(z)).
+
+    Args:
+        weibull_model (WeibullAFTFitter): A fitted Weibull AFT model.
+        survival_df (pd.DataFrame): Survival data without the primary key column.
+        duration_col (str): Column name for the 'duration' or 'time' data.
+        event_col (str): Column name for the 'event occurred' data.
+
+    Returns:
+        str: Key of the distribution in AFT_FITTERS with the highest log-likelihood.
+    """
+    coefficients = weibull_model.params_.loc["lambda_"]
+    covariates = coefficients.index.drop("Intercept")
+    X = survival_df[covariates].to_numpy(dtype=float)
+    beta = coefficients[covariates].to_numpy()
+    log_duration = np.log(survival_df[duration_col].to_numpy(dtype=float))
+
+    residuals = log_duration - (X @ beta + coefficients["Intercept"])
+    observed = survival_df[event_col].to_numpy().astype(bool)
+
+    def negative_log_likelihood(params, distribution):
+        location, log_scale = params
+        z = (residuals - location) / np.exp(log_scale)
+        return -(
+            np.sum(distribution.logpdf(z[observed]) - log_scale)
+            + np.sum(distribution.logsf(z[~observed]))
+        )
+
+    initial_guess = [residuals.mean(), np.log(residuals.std())]
+    log_likelihoods = {
+        model_name: -optimize.minimize(
+            negative_log_likelihood,
+            initial_guess,
+            args=(distribution,),
+            method="Nelder-Mead",
+        ).fun
+        for model_name, distribution in AFT_ERROR_DISTRIBUTIONS.items()
+    }
+    return max(log_likelihoods, key=log_likelihoods.get)
+
 
 class Survival:
     def __init__(
@@ -28,12 +118,55 @@ class Survival:
         self.duration_col = duration_col
         self.event_col = event_col
         self.primary_col = primary_col
-        self.data = data
         self.covariates = data.drop(
             columns=[duration_col, event_col, primary_col]
         ).columns.tolist()
+
+        # Store the event flag and binary covariates as uint8 once, so that the KM and AFT scans read 1 byte per value
+        self.data = data.copy()
+        self.data[event_col] = self.data[event_col].astype(np.uint8)
+        binary_covariates = [
+            column
+            for column in self.covariates
+            if pd.api.types.is_numeric_dtype(self.data[column])
+            and self.data[column].isin([0, 1]).all()
+        ]
+        self.data[binary_covariates] = self.data[binary_covariates].astype(np.uint8)
         self.km_fitter = KaplanMeierFitter()
         self.aft_fitter = None
+        self._full_fit_is_current = False
+        self._survival_df = None
+
+    def _get_survival_df(self):
+        """Returns the data prepared for AFT modelling, computing it on first use.
+
+        The primary key column is removed, durations are clipped to at least 0.0001 and float covariates
+        are downcast to float32.
+
+        Returns:
+            pd.DataFrame: The prepared survival data.
+        """
+        if self._survival_df is None:
+            # Remove primary key column
+            survival_df = self.data.drop(columns=[self.primary_col])
+
+            # Handle zero values in the duration column by clipping durations to at least 0.0001
+            duration = survival_df[self.duration_col].to_numpy(dtype=float, copy=True)
+            np.maximum(duration, 0.0001, out=duration)
+            survival_df[self.duration_col] = duration
+
+            # Store float covariates in single precision to halve the memory traffic of the AFT design matrix
+            float_covariates = [
+                column
+                for column in self.covariates
+                if survival_df[column].dtype == np.float64
+            ]
+            survival_df[float_covariates] = survival_df[float_covariates].astype(
+                np.float32
+            )
+
+            self._survival_df = survival_df
+        return self._survival_df
 
     def fit_kaplan_meier(self):
         """Fits a Kaplan-Meier model to the data.
@@ -81,28 +214,45 @@ class Survival:
         if density:
             title_prefix = "Cumulative Density"
             ylabel = "Cumulative Density"
-            plot_func = self.km_fitter.plot_cumulative_density
+            estimate_attr = "cumulative_density_"
+            ci_attr = "confidence_interval_cumulative_density_"
         else:
             title_prefix = "Survival Probability"
             ylabel = "Survival Probability"
-            plot_func = self.km_fitter.plot_survival_function
+            estimate_attr = "survival_function_"
+            ci_attr = "confidence_interval_survival_function_"
 
         plt.title(f"{title_prefix} Grouped by {covariate}", fontsize=14)
 
-        # Prepare data
-        survival_df = self.data.drop(columns=[self.primary_col])
+        # Prepare data, keeping only the duration and event arrays
+        duration = self.data[self.duration_col].to_numpy()
+        event = self.data[self.event_col].to_numpy()
         if values:
-            survival_df["group"] = map_to_group(values, self.data[covariate])
+            groups = map_to_group(values, self.data[covariate])
         else:
-            survival_df["group"] = self.data[covariate]
-
-        # Group and plot
-        for name, grouped_df in survival_df.groupby("group"):
-            self.km_fitter.fit(
-                grouped_df[self.duration_col], grouped_df[self.event_col], label=name
+            groups = self.data[covariate]
+
+        # Group and plot, slicing the arrays by the positions of each group and
+        # drawing the fitted estimates directly instead of going through lifelines' plotting
+        for name, positions in groups.groupby(groups, observed=True).indices.items():
+            self.km_fitter.fit(duration[positions], event[positions], label=name)
+            estimate = getattr(self.km_fitter, estimate_attr)
+            times = estimate.index.to_numpy()
+            ci = getattr(self.km_fitter, ci_attr).to_numpy()
+            (line,) = ax.step(
+                times, estimate.to_numpy().ravel(), where="post", label=name
+            )
+            ax.fill_between(
+                times,
+                ci[:, 0],
+                ci[:, 1],
+                step="post",
+                alpha=0.3,
+                color=line.get_color(),
+                linewidth=0,
             )
-            plot_func(ax=ax)
 
+        ax.legend()
         plt.ylabel(ylabel, fontsize=13)
 
         # Remove background grid
@@ -112,48 +262,59 @@ class Survival:
         plt.xlabel("Time", fontsize=13)
         plt.show()
 
-    def find_best_aft_model(self):
+    def find_best_aft_model(self, n_jobs: int = 1, fast: bool = False):
         """Finds the best Accelerated Failure Time (AFT) model among Weibull, Log-Normal, and Log-Logistic distributions.
         This method fits each AFT model to the data and selects the model with the lowest Akaike Information Criterion (AIC).
 
+        Args:
+            n_jobs (int): Number of worker processes used to fit the distributions concurrently.
+                          With 1, the models are fitted sequentially in the current process (default is 1).
+                          Values above 1 start worker processes, so calling scripts need an
+                          if __name__ == "__main__" guard.
+            fast (bool): If True, only the Weibull model is fitted in full. The distributions are then compared on its
+                         residuals, and the winner is fitted only if it is not Weibull (default is False).
+
         Returns:
             aft_fitter: The fitted AFT model (either WeibullAFTFitter, LogNormalAFTFitter, or LogLogisticAFTFitter)
                         that best fits the data based on AIC.
 
         """
 
-        weibull_fitter = WeibullAFTFitter()
-        log_normal_fitter = LogNormalAFTFitter()
-        log_logistic_fitter = LogLogisticAFTFitter()
-
-        # Remove primary key column
-        survival_df = self.data.drop(columns=[self.primary_col])
-
-        # Handle zero values in the duration column
-        survival_df[self.duration_col] = survival_df[self.duration_col].replace(
-            0, 0.0001
-        )
-
-        models = {
-            "Weibull": weibull_fitter,
-            "Log-Normal": log_normal_fitter,
-            "Log-Logistic": log_logistic_fitter,
-        }
+        survival_df = self._get_survival_df()
+        fit_args = (survival_df, self.duration_col, self.event_col)
+
+        if fast:
+            weibull_result = _fit_aft("Weibull", *fit_args)
+            model_name = _screen_aft_distributions(weibull_result[1], *fit_args)
+            if model_name == "Weibull":
+                results = [weibull_result]
+            else:
+                results = [_fit_aft(model_name, *fit_args)]
+        elif n_jobs == 1:
+            results = [_fit_aft(model_name, *fit_args) for model_name in AFT_FITTERS]
+        else:
+            # The fits are independent and CPU-bound, so run them in separate processes
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                futures = [
+                    executor.submit(_fit_aft, model_name, *fit_args)
+                    for model_name in AFT_FITTERS
+                ]
+                results = [future.result() for future in futures]
 
         best_aic = float("inf")
         best_model = None
+        best_fitted = None
 
-        for model_name, model in models.items():
-            model.fit(
-                survival_df, duration_col=self.duration_col, event_col=self.event_col
-            )
-            aic = model.AIC_
-
+        for model_name, model, aic in results:
             if aic < best_aic:
                 best_aic = aic
                 best_model = model_name
+                best_fitted = model
 
-        self.aft_fitter = models[best_model]
+        # Keep the already fitted best model, so that fit_best_aft_model can reuse the
+        # full-data fit instead of refitting from scratch
+        self.aft_fitter = best_fitted
+        self._full_fit_is_current = True
         print(f"Best distribution: {best_model} (AIC: {best_aic})")
         return self.aft_fitter
 
@@ -162,7 +323,10 @@ class Survival:
     ):
         """Fits the best Accelerated Failure Time (AFT) model to the data.
 
-        This method fits the previously selected best AFT model to the survival data.
+        This method fits the previously selected best AFT model to the survival data. If the model still holds the
+        full-data fit from find_best_aft_model and no variables are removed, it is returned without refitting.
+        The full-data model is also returned without refitting when no variables are insignificant, or, with a
+        warning, when all of them are.
 
         Args:
             remove_insignificant (bool): Whether to remove insignificant variables based on the specified alpha level (default is False).
@@ -177,32 +341,60 @@ class Survival:
             print("You need to fit the best distribution first.")
             return
 
-        # Remove primary key column
-        survival_df = self.data.drop(columns=[self.primary_col])
+        # The fitter still holds the full-data fit, so there is nothing to refit
+        if self._full_fit_is_current and not remove_insignificant:
+            return self.aft_fitter
 
-        # Handle zero values in the duration column
-        survival_df[self.duration_col] = survival_df[self.duration_col].replace(
-            0, 0.0001
-        )
-
-        model = self.aft_fitter.fit(survival_df, self.duration_col, self.event_col)
+        survival_df = self._get_survival_df()
 
         if remove_insignificant:
-            p_values = model.summary["p"]
-            insignificant_covariates = (
-                p_values[
-                    (p_values.index.get_level_values("covariate") != "Intercept")
-                    & (p_values > alpha)
-                ]
-                .dropna()
-                .index.get_level_values("covariate")
-                .unique()
+            # Reuse the full-data fit from find_best_aft_model when available, otherwise fit it first
+            if not self._full_fit_is_current:
+                self.aft_fitter.fit(survival_df, self.duration_col, self.event_col)
+                self._full_fit_is_current = True
+
+            insignificant_covariates = self._insignificant_covariates(
+                self.aft_fitter.summary, alpha
             )
+
+            # Nothing to prune, so the full-data fit is already the final model
+            if len(insignificant_covariates) == 0:
+                return self.aft_fitter
+
+            # Pruning would leave only the duration and event columns
+            if survival_df.shape[1] - len(insignificant_covariates) <= 2:
+                warnings.warn("All covariates insignificant; returning full model")
+                return self.aft_fitter
+
             survival_df = survival_df.drop(columns=insignificant_covariates)
-            model = self.aft_fitter.fit(survival_df, self.duration_col, self.event_col)
+
+        model = self.aft_fitter.fit(survival_df, self.duration_col, self.event_col)
+
+        # After a pruned refit the fitter holds the reduced model, not the full-data fit
+        self._full_fit_is_current = not remove_insignificant
 
         return model
 
+    @staticmethod
+    def _insignificant_covariates(summary: pd.DataFrame, alpha: float):
+        """Lists the covariates whose p-value exceeds alpha in a fitted AFT model summary.
+
+        Args:
+            summary (pd.DataFrame): The summary of a fitted AFT model.
+            alpha (float): Significance level for determining the insignificance of variables.
+
+        Returns:
+            list: Names of the insignificant covariates, excluding the intercept.
+        """
+        # Work on flat columns instead of traversing the (param, covariate) MultiIndex
+        summary = summary.reset_index()
+        mask = (
+            (summary["covariate"] != "Intercept")
+            & (summary["p"] > alpha)
+            & summary["p"].notna()
+        )
+        return summary.loc[mask, "covariate"].unique().tolist()
+
     def model_summary(self, aft_model):
         """Prints a summary of the fitted Accelerated Failure Time (AFT) model.
 
@@ -261,26 +453,37 @@ class Survival:
         # Remove background grid
         ax.grid(False)
 
-    def plot_survival_curve(self, aft_model, data_point: pd.DataFrame):
+    def plot_survival_curve(
+        self, aft_model, data_point: pd.DataFrame, times: np.ndarray = None, ax=None
+    ):
         """Plots the survival function for individuals, given their covariates.
 
+        The survival functions of all individuals are predicted with a single call and drawn together,
+        so pass all individuals at once instead of calling this method for each one.
+
         Args:
             aft_model: An instance of a fitted AFT model (WeibullAFTFitter, LogNormalAFTFitter, or LogLogisticAFTFitter).
-            data_point (pd.DataFrame): A Pandas DataFrame of covariates.
+            data_point (pd.DataFrame): A Pandas DataFrame of covariates with one row per individual.
+            times (np.ndarray, optional): Times at which the survival function is evaluated. Defaults to 100 points between 0 and 1200.
+            ax (matplotlib.axes.Axes, optional): The axes to plot the survival curve on. If not provided, a new figure will be created and shown.
         """
+        t = _DEFAULT_TIMES if times is None else times
+        show = ax is None
+        if ax is None:
+            _, ax = plt.subplots(1, 1)
 
-        # Generate survival curve
-        t = np.linspace(0, 1200, 100)
+        # Generate survival curves for all individuals, shaped (len(t), len(data_point))
         pred = aft_model.predict_survival_function(data_point, times=t)
 
-        # Plot survival curve
-        plt.plot(t, pred.values)
-        plt.xlabel("Time", fontsize=13)
-        plt.ylabel("Survival Probability", fontsize=13)
-        plt.title("Survival Function", fontsize=14)
-        plt.show()
+        # Plot one survival curve per individual in a single call
+        ax.plot(t, pred.to_numpy())
+        ax.set_xlabel("Time", fontsize=13)
+        ax.set_ylabel("Survival Probability", fontsize=13)
+        ax.set_title("Survival Function", fontsize=14)
+        if show:
+            plt.show()
 
-    def predict_aft_model(self, aft_model, n_time_periods: int):
+    def predict_aft_model(self, aft_model, n_time_periods: int, sink: str = None):
         """Generates survival predictions for a specified number of time periods using an AFT model.
 
         Takes an AFT model and generates survival predictions for a specified number of time periods.
@@ -288,43 +491,60 @@ class Survival:
         Args:
             aft_model: An instance of a fitted AFT model (WeibullAFTFitter, LogNormalAFTFitter, or LogLogisticAFTFitter).
             n_time_periods (int): The number of time periods for which predictions should be generated.
+            sink (str, optional): Path of a Parquet file. If provided, the predictions are computed and written to it
+                                  one time period at a time, keeping memory use independent of n_time_periods.
 
         Returns:
-            pd.DataFrame: DataFrame containing survival predictions for each ID and time period.
+            pd.DataFrame: DataFrame containing survival predictions for each ID and time period, or None if sink is provided.
         """
 
-        # Remove primary key column
-        survival_df = self.data.drop(columns=[self.primary_col])
-        # Handle zero values in the duration column
-        survival_df[self.duration_col] = survival_df[self.duration_col].replace(
-            0, 0.0001
+        survival_df = self._get_survival_df()
+        time_periods = np.arange(1, n_time_periods + 1)
+        ids = self.data[self.primary_col].to_numpy()
+
+        if sink is not None:
+            # Predict and write one time period at a time, so only a single period's probabilities are held in memory
+            writer = None
+            try:
+                for time_period in time_periods:
+                    prediction = aft_model.predict_survival_function(
+                        survival_df, times=[time_period]
+                    )
+                    surv_prob = prediction.to_numpy(dtype=np.float64).ravel()
+                    np.subtract(1.0, surv_prob, out=surv_prob)
+                    np.round(surv_prob, 5, out=surv_prob)
+                    table = pa.table(
+                        {
+                            "id": ids,
+                            "pred_period": np.full(len(ids), time_period),
+                            "survival_probability": surv_prob,
+                        }
+                    )
+                    if writer is None:
+                        writer = pq.ParquetWriter(sink, table.schema)
+                    writer.write_table(table)
+            finally:
+                if writer is not None:
+                    writer.close()
+            print(f"Predictions written to {sink}.")
+            return None
+
+        # Generate survival predictions for all time periods at once, shaped (n_time_periods, n_ids)
+        predictions = aft_model.predict_survival_function(
+            survival_df, times=time_periods
+        )
+        # Transform into the final probabilities in place, without intermediate arrays
+        surv_prob = predictions.to_numpy(dtype=np.float64, copy=True)
+        np.subtract(1.0, surv_prob, out=surv_prob)
+        np.round(surv_prob, 5, out=surv_prob)
+
+        # Build the long-form DataFrame, ordered by time period and then by ID
+        predictions_df = pd.DataFrame(
+            {
+                "id": np.tile(ids, n_time_periods),
+                "pred_period": np.repeat(time_periods, len(survival_df)),
+                "survival_probability": surv_prob.reshape(-1),
+            }
         )
-
-        predictions_df_list = []
-
-        for time_period in range(1, n_time_periods + 1):
-            pred_data = pd.DataFrame(
-                {"id": self.data[self.primary_col], "pred_period": time_period}
-            )
-
-            # Generate survival predictions
-            predictions = aft_model.predict_survival_function(
-                survival_df, times=[time_period]
-            )
-            surv_prob = round(1 - predictions, 5)
-
-            # Convert predictions to a DataFrame
-            predictions_df = pd.DataFrame(
-                surv_prob.T.values, columns=["survival_probability"]
-            )
-
-            # Concatenate customer_id and time_period with predictions DataFrame
-            result_df = pd.concat([pred_data, predictions_df], axis=1)
-
-            # Append to the list
-            predictions_df_list.append(result_df)
-
-        # Concatenate all predictions into a single DataFrame
-        predictions_df = pd.concat(predictions_df_list, ignore_index=True)
         print("Predictions generated successfully.")
         return predictions_df
@@ -2,6 +2,10 @@
 Utility functions
 """
 
+import csv
+import io
+
+import numpy as np
 import pandas as pd
 from sqlalchemy import text
 
@@ -14,46 +18,74 @@ def map_to_group(values: list, series: pd.Series):
         series (pd.Series): Pandas Series containing numerical data.
 
     Returns:
-        pd.Series: A Series where each value is mapped to a group based on the provided edges.
+        pd.Series: A categorical Series where each value is mapped to a group based on the provided edges.
     """
+    series_min, series_max = series.min(), series.max()
+
     # Define groups based on edges
-    groups = [f"Group 1: {min(series)}-{values[0]}"]
+    groups = [f"Group 1: {series_min}-{values[0]}"]
     for i in range(len(values) - 1):
         groups.append(f"Group {i+2}: {values[i]}-{values[i+1]}")
-    groups.append(f"Group {len(values)}: {values[-1]}-{max(series)}")
-
-    def map_value_to_group(value: float):
-        """Map values to groups.
-
-        Args:
-            value (float): A numerical value to be mapped to a group.
+    groups.append(f"Group {len(values) + 1}: {values[-1]}-{series_max}")
 
-        Returns:
-            str:  The group that the value belongs to.
-        """
-        for i, edge in enumerate(values):
-            if value <= edge:
-                return groups[i]
-        return groups[-1]
-
-    # Map values in the series to groups
-    mapped_series = series.apply(map_value_to_group)
+    # Map values in the series to groups in one vectorized pass, each group including its upper edge
+    x = series.to_numpy(dtype=float)
+    codes = np.searchsorted(np.asarray(values, dtype=float), x, side="left")
+    codes[np.isnan(x)] = -1
+    mapped_series = pd.Series(
+        pd.Categorical.from_codes(codes, categories=groups),
+        index=series.index,
+        name=series.name,
+    )
     return mapped_series
 
 
-def from_sql_to_pandas(engine, table_name: str):
+def from_sql_to_pandas(
+    engine, table_name: str, chunksize: int = 100_000, dtype_backend: str = None
+):
     """
     Retrieve data from a PostgreSQL database using SQLAlchemy and return it as a pandas DataFrame.
 
+    Rows are streamed through a server-side cursor in chunks, so the full result set is never buffered by the driver.
+
     Args:
         engine: Engine for the PostgreSQL database.
         table_name (str): The table_name we want to query.
+        chunksize (int, optional): Number of rows fetched per chunk. Defaults to 100 000.
+        dtype_backend (str, optional): Passed to pd.read_sql_query, e.g. 'pyarrow' to avoid object columns for strings.
+                                       Defaults to pandas' NumPy-backed dtypes.
 
     Returns:
         pd.DataFrame: DataFrame containing the retrieved data.
     """
     query = text(f"SELECT * FROM {table_name}")
-    # Execute the query and fetch data into a DataFrame
-    with engine.connect() as connection:
-        df = pd.read_sql_query(query, connection)
+    read_kwargs = {} if dtype_backend is None else {"dtype_backend": dtype_backend}
+
+    # Execute the query and fetch data into a DataFrame chunk by chunk
+    with engine.connect().execution_options(
+        stream_results=True, yield_per=chunksize
+    ) as connection:
+        chunks = pd.read_sql_query(query, connection, chunksize=chunksize, **read_kwargs)
+        df = pd.concat(chunks, ignore_index=True, copy=False)
     return df
+
+
+def psql_insert_copy(table, conn, keys, data_iter):
+    """
+    Insertion method for pd.DataFrame.to_sql that writes rows with PostgreSQL COPY instead of INSERT statements.
+
+    Args:
+        table (pandas.io.sql.SQLTable): The table being written to.
+        conn: SQLAlchemy connection used by to_sql.
+        keys (list): Column names.
+        data_iter (Iterable): Iterable of row tuples.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(data_iter)
+    buffer.seek(0)
+
+    columns = ", ".join(f'"{key}"' for key in keys)
+    table_name = f"{table.schema}.{table.name}" if table.schema else table.name
+
+    with conn.connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table_name} ({columns}) FROM STDIN WITH CSV", buffer)